@@ -0,0 +1,91 @@
+# AdaptiveQuality.py
+
+# Quality tiers from best to cheapest. Each step trades accuracy or latency
+# for CPU: smaller MediaPipe model, smaller inference frame, fewer hands,
+# then skipping inference on some frames.
+QUALITY_TIERS = [
+    {'name': 'High', 'modelComplexity': 1, 'inferenceSize': None, 'maxHands': 2, 'inferenceInterval': 1},
+    {'name': 'Balanced', 'modelComplexity': 1, 'inferenceSize': (640, 360), 'maxHands': 2, 'inferenceInterval': 1},
+    {'name': 'Fast', 'modelComplexity': 0, 'inferenceSize': (640, 360), 'maxHands': 2, 'inferenceInterval': 1},
+    {'name': 'Low', 'modelComplexity': 0, 'inferenceSize': (480, 270), 'maxHands': 1, 'inferenceInterval': 2},
+    {'name': 'Minimal', 'modelComplexity': 0, 'inferenceSize': (480, 270), 'maxHands': 1, 'inferenceInterval': 3},
+]
+
+
+class QualityController:
+    """Pick the best quality tier that holds a target FPS.
+
+    Feed it the measured time of every frame. It keeps an exponential moving
+    average, steps down a tier when frames are too slow for downFrames frames
+    in a row, and steps back up after upFrames frames with clear headroom.
+    A tier never goes above the ceiling, i.e. what the user picked in the UI.
+    """
+
+    def __init__(self, targetFps=20, ceiling=None, tiers=QUALITY_TIERS,
+                 downFrames=15, upFrames=90, headroom=0.7, smoothing=0.1):
+        self.targetFps = targetFps
+        self.ceiling = ceiling or {}
+        self.tiers = tiers
+        self.downFrames = downFrames
+        self.upFrames = upFrames
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.tierIndex = 0
+        self.frameTime = None
+        self._slowFrames = 0
+        self._fastFrames = 0
+
+    @property
+    def tier(self):
+        return self.tiers[self.tierIndex]
+
+    @property
+    def targetFrameTime(self):
+        return 1.0 / self.targetFps
+
+    def update(self, frameTime):
+        """Record one frame time in seconds; returns True when the tier changed."""
+        if frameTime <= 0:
+            return False
+        if self.frameTime is None:
+            self.frameTime = frameTime
+        else:
+            self.frameTime += self.smoothing * (frameTime - self.frameTime)
+
+        if self.frameTime > self.targetFrameTime:
+            self._slowFrames += 1
+            self._fastFrames = 0
+        elif self.frameTime < self.targetFrameTime * self.headroom:
+            self._fastFrames += 1
+            self._slowFrames = 0
+        else:
+            self._slowFrames = self._fastFrames = 0
+
+        if self._slowFrames >= self.downFrames and self.tierIndex < len(self.tiers) - 1:
+            return self._setTier(self.tierIndex + 1)
+        if self._fastFrames >= self.upFrames and self.tierIndex > 0:
+            return self._setTier(self.tierIndex - 1)
+        return False
+
+    def _setTier(self, index):
+        self.tierIndex = index
+        self._slowFrames = self._fastFrames = 0
+        # Let the average settle on the new tier's cost before judging again
+        self.frameTime = None
+        return True
+
+    def settings(self):
+        """Detector settings for the active tier, capped by the ceiling."""
+        tier = self.tier
+        ceiling = self.ceiling
+        settings = {
+            'modelComplexity': min(tier['modelComplexity'], ceiling.get('modelComplexity', 1)),
+            'maxHands': min(tier['maxHands'], ceiling.get('maxHands', 2)),
+            'inferenceInterval': max(tier['inferenceInterval'], ceiling.get('inferenceInterval', 1)),
+            'inferenceSize': tier['inferenceSize'],
+        }
+        # Keep whichever inference size is smaller
+        size = ceiling.get('inferenceSize')
+        if size is not None and (settings['inferenceSize'] is None or size[0] < settings['inferenceSize'][0]):
+            settings['inferenceSize'] = size
+        return settings
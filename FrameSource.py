@@ -0,0 +1,338 @@
+# FrameSource.py
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FrameSource:
+    """Base class for frame sources.
+
+    Sources follow the cv2.VideoCapture surface (read, isOpened, release), so
+    they can be handed to TrackingPipeline or any loop that used a capture.
+    fps is the nominal frame rate, or None when the source is not paced.
+    """
+
+    fps = None
+
+    def read(self):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class CameraSource(FrameSource):
+    """Live camera tuned for latency, with a background latest-frame grabber.
+
+    MJPG keeps USB bandwidth low at 720p and a one-frame driver buffer stops
+    OpenCV from handing out old frames. The grabber thread reads continuously
+    and only the newest frame is kept, so read() never returns a queued one.
+
+    Frames may be handed to several readers at once, so they are read-only;
+    a reader that draws on a frame must work on a copy.
+
+    When nobody has asked for a frame for parkAfter seconds (a paused
+    pipeline) the grabber parks instead of decoding frames nobody reads,
+    and wakes on the next readAfter().
+    """
+
+    def __init__(self, device=0, width=1280, height=720, fourcc="MJPG", bufferSize=1, parkAfter=1.0):
+        self.device = device
+        self.parkAfter = parkAfter
+        self.cap = cv2.VideoCapture(device)
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, bufferSize)
+        # Drivers that do not report a rate return 0
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+
+        self._frame = None
+        self._frameId = 0
+        self._readId = 0
+        self._condition = threading.Condition()
+        self._lastRead = time.monotonic()
+        self._demand = threading.Event()
+        self._running = self.cap.isOpened()
+        self._thread = threading.Thread(target=self._grab, name=f"camera-{device}", daemon=True)
+        if self._running:
+            self._thread.start()
+
+    def _idle(self):
+        return time.monotonic() - self._lastRead > self.parkAfter
+
+    def _grab(self):
+        while self._running:
+            if self._idle():
+                self._demand.clear()
+                # Check again after clearing so a read in between is not lost
+                if self._idle():
+                    self._demand.wait()
+                continue
+            success, img = self.cap.read()
+            if not success:
+                time.sleep(0.01)
+                continue
+            # Shared by every reader: fail loudly instead of letting one
+            # reader's overlay show up in another's frame
+            img.flags.writeable = False
+            with self._condition:
+                self._frame = img
+                self._frameId += 1
+                self._condition.notify_all()
+
+    def read(self, timeout=1.0):
+        # Wait for a frame newer than the one this source last returned
+        self._readId, img = self.readAfter(self._readId, timeout)
+        return img is not None, img
+
+    def readAfter(self, frameId, timeout=1.0):
+        """Wait for a frame newer than frameId; returns (newFrameId, frame).
+
+        frame is None on timeout or once the camera is released. Each reader
+        keeps its own frameId, so several consumers can share one grabber.
+        """
+        self._lastRead = time.monotonic()
+        self._demand.set()
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self._frameId != frameId or not self._running, timeout):
+                return frameId, None
+            return self._frameId, self._frame if self._running else None
+
+    def isOpened(self):
+        return self._running and self.cap.isOpened()
+
+    def release(self):
+        self._running = False
+        self._demand.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(1.0)
+        self.cap.release()
+
+
+class CameraManager:
+    """Process-wide owner of the cameras, shared by reference counting.
+
+    subscribe() opens a device on first use and hands out a
+    CameraSubscription; every subscriber reads the newest frames from the
+    same grabber thread. The device is closed once the last subscription is
+    released and nobody subscribed again within `linger` seconds, so a
+    Streamlit rerun or page switch reuses the open camera instead of paying
+    for a reopen. The first subscriber's capture settings win.
+    """
+
+    def __init__(self, linger=2.0):
+        self.linger = linger
+        self._cameras = {}  # device -> [CameraSource, subscriber count, close timer]
+        self._lock = threading.Lock()
+
+    def subscribe(self, device=0, **cameraArgs):
+        with self._lock:
+            entry = self._cameras.get(device)
+            if entry is not None and not entry[0].isOpened():
+                # Unplugged or failed; open it again
+                entry[0].release()
+                entry = None
+            if entry is None:
+                entry = self._cameras[device] = [CameraSource(device, **cameraArgs), 0, None]
+            if entry[2] is not None:
+                entry[2].cancel()
+                entry[2] = None
+            entry[1] += 1
+            return CameraSubscription(self, device, entry[0])
+
+    def subscribers(self, device=0):
+        with self._lock:
+            entry = self._cameras.get(device)
+            return entry[1] if entry else 0
+
+    def _unsubscribe(self, device, camera):
+        with self._lock:
+            entry = self._cameras.get(device)
+            if entry is None or entry[0] is not camera:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            if self.linger > 0:
+                entry[2] = threading.Timer(self.linger, self._close, (device, camera))
+                entry[2].daemon = True
+                entry[2].start()
+                return
+            del self._cameras[device]
+        camera.release()
+
+    def _close(self, device, camera):
+        with self._lock:
+            entry = self._cameras.get(device)
+            if entry is None or entry[0] is not camera or entry[1] > 0:
+                return
+            del self._cameras[device]
+        camera.release()
+
+    def closeAll(self):
+        with self._lock:
+            entries, self._cameras = list(self._cameras.values()), {}
+        for camera, _, timer in entries:
+            if timer is not None:
+                timer.cancel()
+            camera.release()
+
+
+class CameraSubscription(FrameSource):
+    """One consumer's handle on a shared camera; release() drops the reference.
+
+    read() returns the same read-only array to every subscriber; copy it
+    before drawing on it.
+    """
+
+    def __init__(self, manager, device, camera):
+        self.manager = manager
+        self.device = device
+        self.camera = camera
+        self.fps = camera.fps
+        self._readId = 0
+        self._released = False
+
+    def read(self, timeout=1.0):
+        if self._released:
+            return False, None
+        self._readId, img = self.camera.readAfter(self._readId, timeout)
+        return img is not None, img
+
+    def isOpened(self):
+        return not self._released and self.camera.isOpened()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.manager._unsubscribe(self.device, self.camera)
+
+
+# Every camera in the process is opened through this manager
+CAMERAS = CameraManager()
+
+
+class VideoFileSource(FrameSource):
+    """Frames from a video file, optionally looped and paced at the file's fps."""
+
+    def __init__(self, path, loop=False, realtime=False):
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._nextTime = None
+
+    def read(self):
+        success, img = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = self.cap.read()
+        if success and self.realtime:
+            _pace(self, 1.0 / self.fps)
+        return success, img
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Frames from the images of a directory, in file name order."""
+
+    def __init__(self, path, loop=False, fps=None):
+        self.path = path
+        self.loop = loop
+        self.fps = fps
+        self.files = [os.path.join(path, f) for f in sorted(os.listdir(path))
+                      if f.lower().endswith(IMAGE_EXTENSIONS)]
+        self.index = 0
+        self._nextTime = None
+
+    def read(self):
+        if self.index >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+            self.index = 0
+        img = cv2.imread(self.files[self.index])
+        self.index += 1
+        if self.fps:
+            _pace(self, 1.0 / self.fps)
+        return img is not None, img
+
+    def isOpened(self):
+        return bool(self.files)
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames for benchmarks and machines without a camera.
+
+    Each frame is a static gradient with a bright disc moving across it, so
+    consecutive frames differ like a real scene would.
+    """
+
+    def __init__(self, width=1280, height=720, fps=None, count=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.count = count
+        self.index = 0
+        self._nextTime = None
+        gradient = np.linspace(0, 255, width, dtype=np.float32)
+        self._background = np.empty((height, width, 3), np.uint8)
+        self._background[:] = gradient[None, :, None].astype(np.uint8)
+
+    def read(self):
+        if self.count is not None and self.index >= self.count:
+            return False, None
+        img = self._background.copy()
+        t = self.index / 30.0
+        cx = int((0.5 + 0.4 * np.sin(t)) * self.width)
+        cy = int((0.5 + 0.3 * np.cos(t * 0.7)) * self.height)
+        cv2.circle(img, (cx, cy), self.height // 8, (180, 200, 230), cv2.FILLED)
+        self.index += 1
+        if self.fps:
+            _pace(self, 1.0 / self.fps)
+        return True, img
+
+
+def _pace(source, interval):
+    # Sleep so a non-live source delivers frames at a steady rate
+    now = time.monotonic()
+    if source._nextTime is not None and source._nextTime > now:
+        time.sleep(source._nextTime - now)
+        now = source._nextTime
+    source._nextTime = now + interval
+
+
+def open_source(spec, **kwargs):
+    """Open a frame source from a spec: a camera index, "synthetic",
+    an image directory or a video file path."""
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CAMERAS.subscribe(int(spec), **kwargs)
+    if spec == "synthetic":
+        return SyntheticSource(**kwargs)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, **kwargs)
+    return VideoFileSource(spec, **kwargs)
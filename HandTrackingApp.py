@@ -0,0 +1,237 @@
+# HandTrackingApp.py
+# Streamlit demo for the hand tracker: streamlit run HandTrackingApp.py
+import os
+import time
+
+import cv2
+import streamlit as st
+
+from HandTrackingModule import handDetector, SkinHandDetector, DetectorPool, drawPoints, measure_fps
+from TrackingPipeline import TrackingController
+from FrameSource import CAMERAS
+from AdaptiveQuality import QualityController
+from Instrumentation import StageProfiler, TraceRecorder
+
+
+@st.cache_resource
+def get_detector_pool():
+    # Shared by every session of this Streamlit server, warmed with the demo defaults
+    return DetectorPool().prewarm((2, 0.5, 0.5, 1))
+
+
+# Below this MediaPipe rate the "Auto" tracker falls back to SkinHandDetector
+MIN_MEDIAPIPE_FPS = 12.0
+
+
+@st.cache_resource
+def get_mediapipe_fps():
+    # Measured once per server with a pooled detector
+    pool = get_detector_pool()
+    detector = pool.acquire()
+    try:
+        return measure_fps(detector)
+    finally:
+        pool.release(detector)
+
+
+def _session_detector(pool, settings, detectionCon, trackCon, motionGate, useSkin=False):
+    if useSkin:
+        detector = st.session_state.get('detector')
+        if not isinstance(detector, SkinHandDetector):
+            detector = st.session_state.detector = SkinHandDetector()
+        return detector
+    # Reuse the session's detector when its MediaPipe graph still matches
+    graph_key = (settings['maxHands'], detectionCon, trackCon, settings['modelComplexity'])
+    detector = st.session_state.get('detector')
+    if not isinstance(detector, handDetector) or detector.graphKey != graph_key:
+        detector = st.session_state.detector = pool.acquire(*graph_key)
+    detector.inferenceSize = settings['inferenceSize']
+    detector.inferenceInterval = settings['inferenceInterval']
+    detector.motionGate = motionGate
+    return detector
+
+
+def main():
+    st.set_page_config(page_title="Hand Tracking App", page_icon="✋", layout="wide")
+    
+    # Sidebar configuration
+    st.sidebar.title("Settings")
+    detection_confidence = st.sidebar.slider("Detection Confidence", 0.0, 1.0, 0.5, 0.1)
+    tracking_confidence = st.sidebar.slider("Tracking Confidence", 0.0, 1.0, 0.5, 0.1)
+    max_hands = st.sidebar.selectbox("Maximum Hands", [1, 2], index=1)
+    model_complexity = st.sidebar.selectbox("Model Complexity", [0, 1], index=1)
+    inference_resolution = st.sidebar.selectbox("Inference Resolution", ["Full", "640x360", "480x270"], index=0)
+    inference_interval = st.sidebar.slider("Run Detection Every N Frames", 1, 4, 1)
+    motion_gate = st.sidebar.checkbox("Skip Detection On Static Frames", value=False)
+    tracker_choice = st.sidebar.selectbox("Tracker", ["Auto", "MediaPipe", "OpenCV (low-end CPUs)"], index=0)
+    adaptive_quality = st.sidebar.checkbox("Adaptive Quality", value=False)
+    target_fps = st.sidebar.slider("Target FPS", 5, 60, 20, 5, disabled=not adaptive_quality)
+    record_trace = st.sidebar.checkbox("Record Trace", value=False,
+                                       help="Write a Chrome trace of every frame's stages when tracking stops")
+    
+    # Main content
+    st.title("✋ Hand Tracking Application")
+    st.markdown("---")
+    
+    # Create two columns for layout
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        # Create a placeholder for the video feed
+        frame_placeholder = st.empty()
+    
+    with col2:
+        st.subheader("Controls")
+        start_button = st.button("Start Tracking", key="start")
+        stop_button = st.button("Stop Tracking", key="stop")
+        
+        st.subheader("Statistics")
+        fps_placeholder = st.empty()
+        hands_detected_placeholder = st.empty()
+        quality_placeholder = st.empty()
+        stages_placeholder = st.empty()
+
+        # Per-stage timings survive reruns so they can be downloaded
+        if 'profiler' not in st.session_state:
+            st.session_state.profiler = StageProfiler()
+        profiler = st.session_state.profiler
+        if record_trace and profiler.tracer is None:
+            profiler.tracer = TraceRecorder()
+        elif not record_trace:
+            profiler.tracer = None
+        csv_col, json_col = st.columns(2)
+        csv_col.download_button("Timings CSV", profiler.to_csv(), "stage_timings.csv", "text/csv")
+        json_col.download_button("Timings JSON", profiler.to_json(), "stage_timings.json", "application/json")
+
+        st.subheader("Instructions")
+        st.markdown("""
+        - Click 'Start Tracking' to begin
+        - Show your hand to the camera
+        - Use the sidebar to adjust settings
+        - Click 'Stop Tracking' to end
+        """)
+
+    # Initialize session state
+    if 'tracking' not in st.session_state:
+        st.session_state.tracking = False
+
+    # The sidebar settings are the quality ceiling; with adaptive quality on,
+    # the controller picks the tier below it that holds the target FPS
+    settings = {
+        'maxHands': max_hands,
+        'modelComplexity': model_complexity,
+        'inferenceSize': None if inference_resolution == "Full" else tuple(map(int, inference_resolution.split("x"))),
+        'inferenceInterval': inference_interval,
+    }
+    use_skin = tracker_choice.startswith("OpenCV") or (
+        tracker_choice == "Auto" and get_mediapipe_fps() < MIN_MEDIAPIPE_FPS)
+    quality = None
+    if adaptive_quality and not use_skin:
+        quality = st.session_state.get('quality')
+        if quality is None:
+            quality = st.session_state.quality = QualityController()
+        quality.targetFps = target_fps
+        quality.ceiling = settings
+        settings = quality.settings()
+
+    # The controller keeps the webcam and the capture/inference threads across
+    # reruns; while stopped its threads sleep on an event instead of spinning.
+    # Once idle for long enough it closes itself and hands the detector back
+    # to the pool, so this session must not keep using that detector
+    pool = get_detector_pool()
+    tracker = st.session_state.get('tracker')
+    if tracker is not None and tracker.closed:
+        tracker = None
+        st.session_state.pop('detector', None)
+    detector = _session_detector(pool, settings, detection_confidence, tracking_confidence,
+                                 motion_gate, use_skin)
+    if tracker is None:
+        tracker = st.session_state.tracker = TrackingController(
+            lambda: CAMERAS.subscribe(0), detector, onClose=pool.release, draw=False, profiler=profiler)
+    detector.profiler = profiler
+    previous = tracker.setDetector(detector)
+    if previous is not detector:
+        pool.release(previous)
+
+    if start_button:
+        st.session_state.tracking = True
+
+    if stop_button:
+        st.session_state.tracking = False
+        tracker.pause()
+        st.success("Tracking stopped. You can start again using the Start button.")
+        if profiler.tracer is not None and profiler.tracer.events:
+            os.makedirs("traces", exist_ok=True)
+            trace_path = os.path.join("traces", time.strftime("trace_%Y%m%d_%H%M%S.json"))
+            profiler.tracer.flush(trace_path)
+            st.info(f"Trace written to {trace_path}; open it in chrome://tracing or Perfetto.")
+
+    if st.session_state.tracking:
+        tracker.resume()
+        # The camera caps the frame rate; a target above it can never be met
+        if quality is not None and tracker.sourceFps:
+            quality.targetFps = min(target_fps, tracker.sourceFps)
+
+    if use_skin:
+        quality_placeholder.metric("Tracker", "OpenCV fallback")
+
+    pTime = 0
+    renderTime = 0.0
+
+    while st.session_state.tracking:
+        frame = tracker.read()
+        if frame is None:
+            if tracker.closed:
+                # Closed by the idle watchdog; the next rerun opens a new one
+                break
+            if not tracker.running:
+                # Paused by the idle watchdog; pick up again on this run
+                tracker.resume()
+            continue
+
+        # Calculate FPS
+        cTime = time.time()
+        fps = 1 / (cTime - pTime)
+        pTime = cTime
+
+        if quality is not None:
+            # Judge the tier on the work done per frame, not the loop
+            # interval: that is paced by the camera and would never drop
+            # below its frame time however fast inference is
+            if quality.update(frame.inferenceTime + renderTime):
+                detector = _session_detector(pool, quality.settings(), detection_confidence,
+                                             tracking_confidence, motion_gate)
+                detector.profiler = profiler
+                previous = tracker.setDetector(detector)
+                if previous is not detector:
+                    pool.release(previous)
+            quality_placeholder.metric("Quality Tier", quality.tier['name'])
+
+        renderStart = time.perf_counter()
+        # Landmarks were found on the inference thread; draw the overlay
+        with profiler.span('composite'):
+            img = frame.img
+            detector.drawHands(img, frame.landmarks)
+            if frame.numHands:
+                drawPoints(img, frame.landmarks[0, :, 1:], (255, 0, 255), 10)
+            cv2.putText(img, f"FPS: {int(fps)}", (10, 70), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
+
+        # Encode JPEG straight from BGR; Streamlit passes the bytes through as is
+        with profiler.span('encode'):
+            jpeg = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+
+        with profiler.span('publish'):
+            frame_placeholder.image(jpeg, output_format="JPEG", use_column_width=True)
+
+            # Update statistics
+            fps_placeholder.metric("FPS", f"{int(fps)}")
+            hands_detected_placeholder.metric("Hands Detected", frame.numHands)
+            if frame.index % 15 == 0:
+                stages_placeholder.table([
+                    {'stage': stage, 'p50 ms': f"{row['p50_ms']:.1f}", 'p95 ms': f"{row['p95_ms']:.1f}"}
+                    for stage, row in profiler.summary().items()])
+        renderTime = time.perf_counter() - renderStart
+
+
+if __name__ == "__main__":
+    main()
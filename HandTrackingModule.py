@@ -1,51 +1,363 @@
-from cvzone import HandTrackingModule
 # HandTrackingModule.py
+# Core detectors only. MediaPipe is imported when the first handDetector is
+# built and the Streamlit demo lives in HandTrackingApp, so headless jobs and
+# worker processes load just OpenCV and NumPy.
 import cv2
-import mediapipe as mp
 import time
-import streamlit as st
+import os
+import sys
+import argparse
+import itertools
+import threading
 import numpy as np
+from FrameSource import ImageDirectorySource
+from Instrumentation import NO_SPAN
+
+
+def drawPoints(img, points, color, radius):
+    """Draw filled dots at an (N, 2) int32 array of points in one cv2 call.
+
+    Each point becomes a zero-length segment; with round caps a line of
+    thickness 2 * radius covers the same pixels as cv2.circle(..., FILLED).
+    """
+    if len(points):
+        segments = np.repeat(np.asarray(points, np.int32)[:, None], 2, axis=1)
+        cv2.polylines(img, segments, False, color, 2 * radius)
+    return img
 
 
 class handDetector:
-    def __init__(self, mode=False, maxHands=2, detectionCon=0.5, trackCon=0.5):
+    def __init__(self, mode=False, maxHands=2, detectionCon=0.5, trackCon=0.5,
+                 inferenceSize=None, inferenceInterval=1, inferenceBudget=None,
+                 modelComplexity=1, motionGate=False):
         self.results = None
         self.mode = mode
         self.maxHands = maxHands
         self.detectionCon = detectionCon
         self.trackCon = trackCon
+        self.modelComplexity = modelComplexity
+        # (width, height) MediaPipe runs at, e.g. (640, 360); None = full frame.
+        # Frames are scaled to the width and keep their own aspect ratio
+        self.inferenceSize = inferenceSize
+        # Run MediaPipe only every N frames and/or at most once per
+        # inferenceBudget seconds; frames in between get predicted landmarks
+        self.inferenceInterval = inferenceInterval
+        self.inferenceBudget = inferenceBudget
+        # Skip MediaPipe while the scene is static: no inference at all when
+        # no hand was seen, and the last landmarks are held when one was
+        self.motionGate = motionGate
+        self.motionThreshold = 2.0  # mean abs gray difference, 0-255
+        self.motionSize = (64, 36)
+        # A hand covers little of the frame, so while one is present the
+        # motion inside its padded box is measured too, at handMotionSize
+        self.handMotionSize = (48, 48)
+        self.handMotionPadding = 0.25  # fraction of the hand box size added per side
+        self.motion = None
+        self.handMotion = None
+        self.gatedFrames = 0
+        self._motionRef = None
+        self._handRef = None
+        self._handBox = None  # (x0, y0, x1, y1) in frame pixels
+        # Optional Instrumentation.StageProfiler for convert/inference/landmarks spans
+        self.profiler = None
 
+        import mediapipe as mp
         self.mpHands = mp.solutions.hands
         self.hands = self.mpHands.Hands(
             static_image_mode=self.mode,
             max_num_hands=self.maxHands,
             min_detection_confidence=self.detectionCon,
-            min_tracking_confidence=self.trackCon
+            min_tracking_confidence=self.trackCon,
+            model_complexity=self.modelComplexity
         )
         self.mpDraw = mp.solutions.drawing_utils
+        # Overlay geometry cached once: landmark index pairs for the hand
+        # skeleton, and MediaPipe's default colors for BGR and RGB images
+        self._connections = np.array(sorted(self.mpHands.HAND_CONNECTIONS), np.intp)
+        self._overlayColors = {False: ((224, 224, 224), (0, 0, 255)),
+                               True: ((224, 224, 224), (255, 0, 0))}
         self.tipIds = [4, 8, 12, 16, 20]
+        self._tipIdx = np.array(self.tipIds)
+        self._fingerBits = np.array([1, 2, 4, 8, 16], np.uint8)
+
+        # Landmark buffers, allocated once and reused every frame.
+        # lmNorm holds normalized (x, y, z) per hand, lmPixel holds [id, cx, cy]
+        self.lmNorm = np.zeros((self.maxHands, 21, 3), np.float32)
+        self.lmPixel = np.zeros((self.maxHands, 21, 3), np.int32)
+        self.lmPixel[:, :, 0] = np.arange(21, dtype=np.int32)
+        self._pixelScale = np.zeros(2, np.float32)
+        # +1 for a "Left" hand, -1 for a "Right" hand (direction the thumb opens)
+        self.handSign = np.ones(self.maxHands, np.float32)
+        self.handTypes = []
+        self.numHands = 0
+        self.lmList = []
+
+        # Constant-velocity state for the frames MediaPipe is skipped on
+        self.lmVelocity = np.zeros_like(self.lmNorm)
+        self._lmObserved = np.zeros_like(self.lmNorm)
+        self._observedHands = 0
+        self._observedTime = None
+        self.maxPrediction = 0.25  # seconds a prediction may run ahead
+        self.inferred = False
+        self.frameCount = 0
+        self.inferenceCount = 0
+        self._framesSinceInference = 0
+
+    @property
+    def graphKey(self):
+        # Settings baked into the MediaPipe graph; detectors with equal keys are interchangeable
+        return (self.maxHands, self.detectionCon, self.trackCon, self.modelComplexity)
+
+    def warmup(self, shape=(720, 1280, 3)):
+        """Run one dummy frame through MediaPipe so the first real frame is not slow."""
+        self.hands.process(np.zeros(shape, np.uint8))
+        self.reset()
+        return self
+
+    def reset(self):
+        """Forget per-session tracking state (last hands, prediction, motion references)."""
+        self.results = None
+        self.numHands = 0
+        self.handTypes = []
+        self.lmList = []
+        self._observedHands = 0
+        self._observedTime = None
+        self._framesSinceInference = 0
+        self._motionRef = None
+        self._handRef = None
+        self._handBox = None
+
+    def _inferenceImage(self, img, frame=None):
+        # Downscale once before the color conversion so both run on fewer pixels.
+        # Landmarks are normalized to the image, so they map straight back to
+        # the display resolution in findPosition.
+        size = self._scaledSize(img)
+        if frame is not None:
+            # Full frame from the pipeline: share its per-frame conversion cache
+            return frame.convert(cv2.COLOR_BGR2RGB, size)
+        if size is not None:
+            img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    def _scaledSize(self, img):
+        # Only the width of inferenceSize is used; the height follows the
+        # image's own aspect ratio so a 4:3 camera is not squashed to 16:9
+        if self.inferenceSize is None:
+            return None
+        h, w = img.shape[:2]
+        scale = self.inferenceSize[0] / w
+        if scale >= 1:
+            return None
+        return max(1, round(w * scale)), max(1, round(h * scale))
 
-    def findHands(self, img, draw=True):
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB)
+    def _span(self, stage):
+        return self.profiler.span(stage) if self.profiler is not None else NO_SPAN
+
+    def _process(self, img, frame=None):
+        with self._span('convert'):
+            imgRGB = self._inferenceImage(img, frame=frame)
+        with self._span('inference'):
+            self.results = self.hands.process(imgRGB)
+        with self._span('landmarks'):
+            self._storeLandmarks(self.results.multi_hand_landmarks,
+                                 self.results.multi_handedness)
+
+    def _shouldInfer(self, now):
+        if self._observedTime is None:
+            return True
+        if self._framesSinceInference + 1 < self.inferenceInterval:
+            return False
+        if self.inferenceBudget is not None and now - self._observedTime < self.inferenceBudget:
+            return False
+        return True
+
+    def _observe(self, now):
+        # Update the velocity estimate from two consecutive observations
+        n = self.numHands
+        dt = now - self._observedTime if self._observedTime is not None else 0.0
+        if n and n == self._observedHands and dt > 0:
+            np.subtract(self.lmNorm[:n], self._lmObserved[:n], out=self.lmVelocity[:n])
+            self.lmVelocity[:n] /= dt
+        else:
+            self.lmVelocity[:] = 0
+        self._lmObserved[:n] = self.lmNorm[:n]
+        self._observedHands = n
+        self._observedTime = now
+
+    def _predict(self, now):
+        # Extrapolate the last observation instead of running MediaPipe
+        n = self.numHands = self._observedHands
+        dt = min(now - self._observedTime, self.maxPrediction)
+        np.multiply(self.lmVelocity[:n], dt, out=self.lmNorm[:n])
+        self.lmNorm[:n] += self._lmObserved[:n]
+
+    def _motionThumbnail(self, img, frame=None):
+        # Tiny grayscale copy; downscaling first keeps the conversion nearly free
+        if frame is not None:
+            return frame.convert(cv2.COLOR_BGR2GRAY, self.motionSize)
+        small = cv2.resize(img, self.motionSize, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _isStatic(self, thumbnail):
+        # Compare against the frame MediaPipe last ran on, so slow drift adds up
+        if self._motionRef is None:
+            self.motion = None
+            return False
+        self.motion = cv2.norm(thumbnail, self._motionRef, cv2.NORM_L1) / thumbnail.size
+        return self.motion < self.motionThreshold
+
+    def _handThumbnail(self, img, box):
+        x0, y0, x1, y1 = box
+        small = cv2.resize(img[y0:y1, x0:x1], self.handMotionSize, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _isHandStatic(self, img):
+        # Same test inside the box of the hands MediaPipe last saw
+        if self._handBox is None:
+            self.handMotion = None
+            return True
+        thumbnail = self._handThumbnail(img, self._handBox)
+        self.handMotion = cv2.norm(thumbnail, self._handRef, cv2.NORM_L1) / thumbnail.size
+        return self.handMotion < self.motionThreshold
+
+    def _updateHandRef(self, img):
+        n = self._observedHands
+        if not n:
+            self._handBox = self._handRef = None
+            return
+        h, w = img.shape[:2]
+        xy = self._lmObserved[:n, :, :2].reshape(-1, 2) * (w, h)
+        (bx0, by0), (bx1, by1) = xy.min(axis=0), xy.max(axis=0)
+        pad = max(bx1 - bx0, by1 - by0) * self.handMotionPadding
+        x0, y0 = max(0, int(bx0 - pad)), max(0, int(by0 - pad))
+        x1, y1 = min(w, int(bx1 + pad) + 1), min(h, int(by1 + pad) + 1)
+        if x1 <= x0 or y1 <= y0:
+            self._handBox = self._handRef = None
+            return
+        self._handBox = (x0, y0, x1, y1)
+        self._handRef = self._handThumbnail(img, self._handBox)
+
+    def findHands(self, img, draw=True, timestamp=None, frame=None):
+        # frame: optional TrackedFrame holding img, whose cached conversions are reused
+        now = time.monotonic() if timestamp is None else timestamp
+        self.frameCount += 1
+        self.inferred = self._shouldInfer(now)
+        gated = False
+        if self.inferred and self.motionGate:
+            thumbnail = self._motionThumbnail(img, frame)
+            gated = self._isStatic(thumbnail) and self._isHandStatic(img)
+            if not gated:
+                self._motionRef = thumbnail
+        if gated:
+            # Hold the last observed hands (if any) with zero velocity
+            self.inferred = False
+            self.gatedFrames += 1
+            n = self.numHands = self._observedHands
+            self.lmNorm[:n] = self._lmObserved[:n]
+            self._observe(now)
+            self._framesSinceInference = 0
+        elif self.inferred:
+            self._process(img, frame)
+            self._observe(now)
+            if self.motionGate:
+                self._updateHandRef(img)
+            self.inferenceCount += 1
+            self._framesSinceInference = 0
+        else:
+            self._predict(now)
+            self._framesSinceInference += 1
 
-        if self.results.multi_hand_landmarks:
-            for handLms in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mpDraw.draw_landmarks(img, handLms,
-                                               self.mpHands.HAND_CONNECTIONS)
+        # Skipped frames keep drawing the last MediaPipe result
+        if draw:
+            self.drawHands(img)
+            if frame is not None:
+                frame.invalidate()
         return img
 
+    def drawHands(self, img, landmarks=None, rgb=False):
+        """Draw the skeleton of every hand with two batched cv2.polylines calls.
+
+        landmarks is a (hands, 21, 3) [id, cx, cy] array such as
+        TrackedFrame.landmarks; by default the detector's current hands.
+        rgb=True when img is in RGB order.
+        """
+        if landmarks is None:
+            landmarks = self._toPixels(img, self.numHands)
+        if not len(landmarks):
+            return img
+        connectionColor, landmarkColor = self._overlayColors[rgb]
+        points = landmarks[:, :, 1:]
+        segments = points[:, self._connections].reshape(-1, 2, 2)
+        cv2.polylines(img, segments, False, connectionColor, 2)
+        drawPoints(img, points.reshape(-1, 2), landmarkColor, 3)
+        return img
+
+    def _storeLandmarks(self, handLandmarks, handedness=None):
+        # Copy MediaPipe landmarks into the preallocated normalized buffer
+        self.numHands = 0
+        self.handTypes = []
+        if not handLandmarks:
+            return
+        for handNo, handLms in enumerate(handLandmarks[:self.maxHands]):
+            self.lmNorm[handNo] = np.fromiter(
+                (v for lm in handLms.landmark for v in (lm.x, lm.y, lm.z)),
+                dtype=np.float32, count=63).reshape(21, 3)
+            # MediaPipe labels hands as seen in a mirrored (selfie) frame
+            handType = handedness[handNo].classification[0].label if handedness else "Left"
+            self.handTypes.append(handType)
+            self.handSign[handNo] = -1.0 if handType == "Right" else 1.0
+        self.numHands = min(len(handLandmarks), self.maxHands)
+
+    def _toPixels(self, img, count):
+        h, w = img.shape[:2]
+        self._pixelScale[0] = w
+        self._pixelScale[1] = h
+        lmPixel = self.lmPixel[:count]
+        # One vectorized multiply; the float -> int32 cast truncates like int()
+        np.multiply(self.lmNorm[:count, :, :2], self._pixelScale,
+                    out=lmPixel[:, :, 1:], casting='unsafe')
+        return lmPixel
+
+    def findPositionArray(self, img, handNo=0, draw=True):
+        """Return a (21, 3) int32 array of [id, cx, cy] for one hand, or None.
+
+        The array is a view into a buffer that is reused on the next frame,
+        copy it if it has to outlive the current frame.
+        """
+        if handNo >= self.numHands:
+            return None
+        lmPixel = self._toPixels(img, handNo + 1)[handNo]
+        if draw:
+            drawPoints(img, lmPixel[:, 1:], (255, 0, 255), 10)
+        return lmPixel
+
+    def findAllPositions(self, img):
+        """Return a (hands, 21, 3) int32 array of [id, cx, cy] for every detected hand."""
+        return self._toPixels(img, self.numHands)
+
+    def fingersUpAll(self):
+        """Return a uint8 bitmask per detected hand, bit 0 = thumb ... bit 4 = pinky.
+
+        All hands are classified in one pass over the normalized landmarks,
+        using the handedness label to decide which way the thumb opens.
+        """
+        lm = self.lmNorm[:self.numHands]
+        tips = lm[:, self._tipIdx]
+        up = np.empty((self.numHands, 5), bool)
+        # Thumb: tip beyond the IP joint in the direction the thumb opens
+        up[:, 0] = (tips[:, 0, 0] - lm[:, 3, 0]) * self.handSign[:self.numHands] > 0
+        # 4 Fingers: tip above the PIP joint (smaller y)
+        up[:, 1:] = tips[:, 1:, 1] < lm[:, self._tipIdx[1:] - 2, 1]
+        return up.astype(np.uint8) @ self._fingerBits
+
+    @staticmethod
+    def maskToFingers(mask):
+        """Expand a fingersUpAll bitmask into the [thumb, ..., pinky] list fingersUp returns."""
+        return [(int(mask) >> i) & 1 for i in range(5)]
+
     def findPosition(self, img, handNo=0, draw=True):
-        self.lmList = []
-        if self.results.multi_hand_landmarks:
-            myHand = self.results.multi_hand_landmarks[handNo]
-            for id, lm in enumerate(myHand.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                self.lmList.append([id, cx, cy])
-                if draw:
-                    cv2.circle(img, (cx, cy), 10, (255, 0, 255), cv2.FILLED)
+        lmPixel = self.findPositionArray(img, handNo, draw)
+        self.lmList = lmPixel.tolist() if lmPixel is not None else []
         return self.lmList
 
     def fingersUp(self):
@@ -67,105 +379,417 @@ class handDetector:
         return fingers
 
 
+class SkinHandDetector:
+    """Pure-OpenCV fallback with the handDetector surface, for CPUs that
+    cannot run MediaPipe at a usable frame rate.
+
+    Finds the largest skin-colored blob, takes the palm center from a
+    distance transform and splits the outline into fingers at the deep
+    convexity defects (the valleys between fingers); each finger's point
+    farthest from the palm is a fingertip if it reaches well above it.
+    It only tracks one hand and fills the landmarks the painter reads: the
+    fingertips (ids 4, 8, 12, 16, 20) are placed on the detected tips and
+    every other id sits on the palm center. With one tip raised only the
+    index finger is up, with two the index and middle fingers, and so on.
+    """
+
+    def __init__(self, maxHands=1, processWidth=320, minArea=0.003,
+                 skinLower=(0, 133, 77), skinUpper=(255, 173, 127)):
+        if maxHands != 1:
+            raise ValueError(f"SkinHandDetector tracks one hand, got maxHands={maxHands}")
+        self.maxHands = 1
+        self.processWidth = processWidth
+        self.minArea = minArea  # fraction of the frame
+        self.skinLower = np.array(skinLower, np.uint8)
+        self.skinUpper = np.array(skinUpper, np.uint8)
+        # 3x3: at processWidth 320 a 5x5 closing fills the gap between fingers
+        # whose tips are 40 px apart at 720p
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self.tipIds = [4, 8, 12, 16, 20]
+        self.results = None
+        self.graphKey = None
+        self.inferred = True
+        self.handTypes = []
+        self.numHands = 0
+        self.lmList = []
+        # Normalized landmarks like handDetector.lmNorm (z is always 0)
+        self.lmNorm = np.zeros((1, 21, 3), np.float32)
+        self.lmPixel = np.zeros((1, 21, 3), np.int32)
+        self.lmPixel[:, :, 0] = np.arange(21, dtype=np.int32)
+        self.contour = None
+        self.tips = np.zeros((0, 2), np.float32)
+        self._fingerCount = 0
+
+    def reset(self):
+        self.numHands = 0
+        self.handTypes = []
+        self.lmList = []
+        self.contour = None
+        self.tips = np.zeros((0, 2), np.float32)
+        self._fingerCount = 0
+
+    def warmup(self, shape=(720, 1280, 3)):
+        return self
+
+    def findHands(self, img, draw=True, timestamp=None, frame=None):
+        h, w = img.shape[:2]
+        scale = min(1.0, self.processWidth / w)
+        size = (round(w * scale), round(h * scale)) if scale < 1 else None
+        if frame is not None:
+            # The frame's cache resizes and converts once for every consumer
+            ycrcb = frame.convert(cv2.COLOR_BGR2YCrCb, size)
+        else:
+            small = cv2.resize(img, size, interpolation=cv2.INTER_AREA) if size is not None else img
+            ycrcb = cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb)
+        mask = cv2.inRange(ycrcb, self.skinLower, self.skinUpper)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.kernel)
+
+        # Per-frame state; fingersUp() must not report the last hand's gesture
+        self.numHands = 0
+        self.handTypes = []
+        self.contour = None
+        self.tips = np.zeros((0, 2), np.float32)
+        self._fingerCount = 0
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if contours:
+            contour = max(contours, key=cv2.contourArea)
+            if cv2.contourArea(contour) >= self.minArea * mask.size:
+                self._fitHand(mask, contour, mask.shape)
+                self.contour = (contour / scale).astype(np.int32)
+
+        if draw and self.contour is not None:
+            cv2.drawContours(img, [self.contour], -1, (0, 255, 0), 2)
+            drawPoints(img, (self.tips * (w, h)).astype(np.int32), (0, 0, 255), 8)
+            if frame is not None:
+                frame.invalidate()
+        return img
+
+    def _fitHand(self, mask, contour, shape):
+        h, w = shape[:2]
+        # Palm: the point deepest inside the blob
+        blob = np.zeros_like(mask)
+        cv2.drawContours(blob, [contour], -1, 255, cv2.FILLED)
+        dist = cv2.distanceTransform(blob, cv2.DIST_L2, 3)
+        _, radius, _, (px, py) = cv2.minMaxLoc(dist)
+
+        tips = self._fingertips(contour, px, py, radius)
+
+        self._fingerCount = len(tips)
+        self.tips = tips / (w, h)
+        self.lmNorm[0, :, 0] = px / w
+        self.lmNorm[0, :, 1] = py / h
+        self.lmNorm[0, :, 2] = 0
+        # Highest tip is the index finger, then middle, ring, pinky, thumb
+        for tipId, tip in zip([8, 12, 16, 20, 4], self.tips):
+            self.lmNorm[0, tipId, :2] = tip
+        self.numHands = 1
+        self.handTypes = ["Unknown"]
+
+    def _fingertips(self, contour, px, py, radius):
+        # Valleys between fingers: convexity defects deeper than a fraction
+        # of the palm radius, lying above the palm's lower edge
+        points = contour.reshape(-1, 2).astype(np.float32)
+        valleys = []
+        try:
+            hull = cv2.convexHull(contour, returnPoints=False)
+            defects = cv2.convexityDefects(contour, hull) if len(hull) > 3 else None
+        except cv2.error:
+            # Self-intersecting outlines can yield a non-monotonic hull
+            defects = None
+        if defects is not None:
+            defects = defects.reshape(-1, 4)
+            deep = (defects[:, 3] / 256.0 > 0.3 * radius) & (points[defects[:, 2], 1] < py + radius)
+            valleys = np.sort(defects[deep, 2])
+
+        # Each stretch of outline between two valleys holds at most one finger;
+        # its tip is the point above the palm farthest from its center (the
+        # wrist below can reach farther)
+        bounds = list(valleys) + [valleys[0] + len(points)] if len(valleys) else [0, len(points)]
+        tips = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            segment = points[np.arange(start, stop) % len(points)]
+            offsets = segment - (px, py)
+            reach = np.where(offsets[:, 1] < 0, np.hypot(offsets[:, 0], offsets[:, 1]), 0)
+            i = int(np.argmax(reach))
+            if reach[i] > 1.8 * radius:
+                tips.append(segment[i])
+        tips = sorted(tips, key=lambda tip: tip[1])
+        # Guard against one finger split by a shallow notch
+        merged = []
+        for tip in tips:
+            if all(np.hypot(*(tip - other)) > 0.25 * radius for other in merged):
+                merged.append(tip)
+        return np.array(merged[:5], np.float32).reshape(-1, 2)
+
+    def drawHands(self, img, landmarks=None, rgb=False):
+        if self.contour is not None:
+            cv2.drawContours(img, [self.contour], -1, (0, 255, 0), 2)
+        return img
+
+    def findPositionArray(self, img, handNo=0, draw=True):
+        if handNo >= self.numHands:
+            return None
+        h, w = img.shape[:2]
+        np.multiply(self.lmNorm[0, :, :2], (w, h), out=self.lmPixel[0, :, 1:], casting='unsafe')
+        if draw:
+            drawPoints(img, self.lmPixel[0, :, 1:], (255, 0, 255), 10)
+        return self.lmPixel[0]
+
+    def findAllPositions(self, img):
+        self.findPositionArray(img, draw=False)
+        return self.lmPixel[:self.numHands]
+
+    def findPosition(self, img, handNo=0, draw=True):
+        lmPixel = self.findPositionArray(img, handNo, draw)
+        self.lmList = lmPixel.tolist() if lmPixel is not None else []
+        return self.lmList
+
+    def fingersUp(self):
+        count = self._fingerCount
+        # [thumb, index, middle, ring, pinky]; the thumb only counts as the fifth tip
+        return [int(count >= 5)] + [int(count > i) for i in range(4)]
+
+    def fingersUpAll(self):
+        mask = sum(bit << i for i, bit in enumerate(self.fingersUp()))
+        return np.array([mask] * self.numHands, np.uint8)
+
+    maskToFingers = staticmethod(handDetector.maskToFingers)
+
+
+def measure_fps(detector, frames=None, count=20, shape=(720, 1280, 3)):
+    """Frames per second detector.findHands reaches on the given (or blank) frames."""
+    frames = frames or [np.zeros(shape, np.uint8)]
+    detector.findHands(frames[0], draw=False)
+    start = time.perf_counter()
+    for i in range(count):
+        detector.findHands(frames[i % len(frames)], draw=False, timestamp=float(i))
+    elapsed = time.perf_counter() - start
+    detector.reset()
+    return count / elapsed if elapsed > 0 else float('inf')
+
+
+def select_detector(minFps=12.0, frames=None, **detectorArgs):
+    """Return a MediaPipe handDetector, or a SkinHandDetector when MediaPipe
+    measures below minFps on this machine."""
+    detector = handDetector(**detectorArgs)
+    if measure_fps(detector, frames) >= minFps:
+        return detector
+    return SkinHandDetector()
+
+
+class DetectorPool:
+    """Warm handDetector instances keyed by (maxHands, detectionCon, trackCon,
+    modelComplexity), so a session gets a ready MediaPipe graph instead of
+    building one on every rerun.
+
+    A detector is used by one session at a time: acquire() hands out an idle
+    one (or builds and warms a new one) and release() gives it back with its
+    tracking state, per-session settings and counters reset, so the next
+    session gets what a fresh handDetector would be.
+    """
+
+    # handDetector's constructor defaults for the settings acquire() may change
+    SESSION_DEFAULTS = {'inferenceSize': None, 'inferenceInterval': 1, 'inferenceBudget': None,
+                        'motionGate': False, 'profiler': None}
+    COUNTERS = ('gatedFrames', 'frameCount', 'inferenceCount')
+
+    def __init__(self, warmupShape=(720, 1280, 3)):
+        self.warmupShape = warmupShape
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self, maxHands=2, detectionCon=0.5, trackCon=0.5, modelComplexity=1, **settings):
+        key = (maxHands, detectionCon, trackCon, modelComplexity)
+        with self._lock:
+            idle = self._idle.get(key)
+            detector = idle.pop() if idle else None
+        if detector is None:
+            detector = handDetector(maxHands=maxHands, detectionCon=detectionCon, trackCon=trackCon,
+                                    modelComplexity=modelComplexity).warmup(self.warmupShape)
+            self.created += 1
+        # Per-session settings that do not need a new graph
+        for name, value in settings.items():
+            setattr(detector, name, value)
+        return detector
+
+    def release(self, detector):
+        if not isinstance(detector, handDetector):
+            return
+        detector.reset()
+        for name, value in self.SESSION_DEFAULTS.items():
+            setattr(detector, name, value)
+        for name in self.COUNTERS:
+            setattr(detector, name, 0)
+        with self._lock:
+            self._idle.setdefault(detector.graphKey, []).append(detector)
+
+    def prewarm(self, *keys):
+        """Build and warm one idle detector for each (maxHands, detectionCon, trackCon, modelComplexity)."""
+        for key in keys:
+            self.release(self.acquire(*key))
+        return self
+
+
 def main():
-    st.set_page_config(page_title="Hand Tracking App", page_icon="✋", layout="wide")
-    
-    # Sidebar configuration
-    st.sidebar.title("Settings")
-    detection_confidence = st.sidebar.slider("Detection Confidence", 0.0, 1.0, 0.5, 0.1)
-    tracking_confidence = st.sidebar.slider("Tracking Confidence", 0.0, 1.0, 0.5, 0.1)
-    max_hands = st.sidebar.selectbox("Maximum Hands", [1, 2], index=1)
-    
-    # Main content
-    st.title("✋ Hand Tracking Application")
-    st.markdown("---")
-    
-    # Create two columns for layout
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        # Create a placeholder for the video feed
-        frame_placeholder = st.empty()
-    
-    with col2:
-        st.subheader("Controls")
-        start_button = st.button("Start Tracking", key="start")
-        stop_button = st.button("Stop Tracking", key="stop")
-        
-        st.subheader("Statistics")
-        fps_placeholder = st.empty()
-        hands_detected_placeholder = st.empty()
-        
-        st.subheader("Instructions")
-        st.markdown("""
-        - Click 'Start Tracking' to begin
-        - Show your hand to the camera
-        - Use the sidebar to adjust settings
-        - Click 'Stop Tracking' to end
-        """)
-
-    # Initialize session state
-    if 'tracking' not in st.session_state:
-        st.session_state.tracking = False
-
-    # Initialize the detector with user settings
-    detector = handDetector(
-        mode=False,
-        maxHands=max_hands,
-        detectionCon=detection_confidence,
-        trackCon=tracking_confidence
-    )
-
-    # Initialize webcam
-    cap = cv2.VideoCapture(0)
-    
-    pTime = 0
-    
-    while cap.isOpened():
-        if start_button:
-            st.session_state.tracking = True
-        
-        if stop_button:
-            st.session_state.tracking = False
+    # The Streamlit demo moved to HandTrackingApp; imported here so that
+    # importing the detector never pulls in Streamlit
+    from HandTrackingApp import main as app_main
+    app_main()
+
+
+def _list_frames(source):
+    # Image directory -> sorted file list, video file -> frame count and fps.
+    # The count is None when the container does not report a usable one
+    if os.path.isdir(source):
+        files = ImageDirectorySource(source).files
+        if not files:
+            raise ValueError(f"No images in {source!r}")
+        return files, 0.0
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"No such video or directory: {source!r}")
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video {source!r}")
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    return (count if count > 0 else None), fps
+
+
+def _extract_segment(source, start, stop, fps, detector_args, warmup=0):
+    """Run a fresh handDetector over frames [start, stop) of one source.
+
+    The detector first runs over up to `warmup` frames before start and
+    their rows are dropped, so a tracking-mode detector reaches the segment
+    in the same state a single pass over the whole source would have. With
+    stop None a video is read to its end.
+    """
+    detector = handDetector(**detector_args)
+    rows = {'frame': [], 'timestamp': [], 'num_hands': [], 'handedness': [],
+            'fingers': [], 'landmarks': []}
+    first = max(0, start - warmup)
+
+    if isinstance(source, list):
+        frames = ((i, cv2.imread(source[i])) for i in range(first, stop))
+    else:
+        cap = cv2.VideoCapture(source)
+        if first:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+        indices = itertools.count(first) if stop is None else range(first, stop)
+        frames = ((i, cap.read()[1]) for i in indices)
+
+    for index, img in frames:
+        if img is None:
             break
-            
-        if not st.session_state.tracking:
+        timestamp = index / fps if fps else float(index)
+        detector.findHands(img, draw=False, timestamp=timestamp)
+        if index < start:
             continue
+        n = detector.numHands
+        # MediaPipe lists hands in tracking order; sort by handedness, then
+        # wrist x, so rows do not depend on the detector's history
+        order = sorted(range(n), key=lambda k: (detector.handTypes[k], float(detector.lmNorm[k, 0, 0])))
+        fingers = detector.fingersUpAll()
+        rows['frame'].append(index)
+        rows['timestamp'].append(timestamp)
+        rows['num_hands'].append(n)
+        rows['handedness'].append([detector.handTypes[k] for k in order])
+        rows['fingers'].append(fingers[order].tolist())
+        rows['landmarks'].append(detector.lmNorm[order].reshape(n, 63).tolist())
 
-        success, img = cap.read()
-        if not success:
-            continue
+    if not isinstance(source, list):
+        cap.release()
+    return rows
 
-        # Process the image
-        img = detector.findHands(img)
-        lmList = detector.findPosition(img)
-        
-        # Calculate FPS
-        cTime = time.time()
-        fps = 1 / (cTime - pTime)
-        pTime = cTime
-        
-        # Update statistics
-        fps_placeholder.metric("FPS", f"{int(fps)}")
-        hands_detected = len(detector.results.multi_hand_landmarks) if detector.results.multi_hand_landmarks else 0
-        hands_detected_placeholder.metric("Hands Detected", hands_detected)
-        
-        # Add FPS text to image
-        cv2.putText(img, f"FPS: {int(fps)}", (10, 70), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
-        
-        # Convert the image to RGB for Streamlit
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
-        # Display the image in Streamlit
-        frame_placeholder.image(img_rgb, channels="RGB", use_column_width=True)
-        
-        # Add a small delay to control the frame rate
-        time.sleep(0.01)
-
-    # Release resources
-    cap.release()
-    st.success("Tracking stopped. You can start again using the Start button.")
+
+def extract_landmarks(source, output, workers=1, segment_size=300, warmup=15, **detector_args):
+    """Write per-frame landmarks, handedness and finger states of a video file
+    or image directory to a Parquet file. Returns the number of frames written.
+
+    With workers > 1 the frames are split into segments of segment_size and
+    processed in a process pool, each worker with its own detector. In
+    tracking mode every segment after the first starts `warmup` frames early
+    so its output does not depend on where the segments were cut.
+    """
+    import multiprocessing
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from concurrent.futures import ProcessPoolExecutor
+
+    frames, fps = _list_frames(source)
+    isList = isinstance(frames, list)
+    total = len(frames) if isList else frames
+    detector_args.setdefault('mode', isList)
+    # Static-image mode keeps no state between frames, so needs no warm-up
+    warmup = 0 if detector_args['mode'] else warmup
+    if total is None:
+        # No frame count to split on: one sequential pass to the end
+        segments = [(source, 0, None, fps, detector_args, 0)]
+    else:
+        segments = [(frames if isList else source, start,
+                     min(start + segment_size, total), fps, detector_args, warmup)
+                    for start in range(0, total, segment_size)]
+        if not isList:
+            # Video frame counts can be estimates; read the last one to the end
+            segments[-1] = segments[-1][:2] + (None,) + segments[-1][3:]
+
+    if workers > 1 and len(segments) > 1:
+        # Spawned workers: forking a process that already ran MediaPipe can
+        # leave its graph threads' locks held in the child
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_extract_segment, *zip(*segments)))
+    else:
+        results = [_extract_segment(*segment) for segment in segments]
+
+    columns = {key: [v for rows in results for v in rows[key]] for key in results[0]}
+    if not columns['frame']:
+        raise ValueError(f"No frames could be read from {source!r}")
+    if columns['frame'] != list(range(len(columns['frame']))):
+        # A segment stopped early (decode error or bad seek) before a later one
+        raise RuntimeError(f"Frames missing from {source!r}: a segment ended before its stop")
+    schema = pa.schema([
+        ('frame', pa.int32()),
+        ('timestamp', pa.float64()),
+        ('num_hands', pa.int8()),
+        ('handedness', pa.list_(pa.string())),
+        ('fingers', pa.list_(pa.uint8())),
+        # Normalized x, y, z for the 21 landmarks, flattened
+        ('landmarks', pa.list_(pa.list_(pa.float32(), 63))),
+    ])
+    table = pa.Table.from_pydict(columns, schema=schema)
+    pq.write_table(table, output)
+    return table.num_rows
+
+
+def batch_main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract hand landmarks to Parquet without a webcam.")
+    parser.add_argument("source", help="video file or directory of frames")
+    parser.add_argument("output", help="Parquet file to write")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--segment-size", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=15,
+                        help="frames each segment re-reads before its start in tracking mode")
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--detection-con", type=float, default=0.5)
+    parser.add_argument("--track-con", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    try:
+        count = extract_landmarks(args.source, args.output, workers=args.workers,
+                                  segment_size=args.segment_size, warmup=args.warmup, maxHands=args.max_hands,
+                                  detectionCon=args.detection_con, trackCon=args.track_con)
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+    elapsed = time.time() - start
+    print(f"Wrote {count} frames to {args.output} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.1f} fps)")
 
 
 if __name__ == "__main__":
-    main()
+    # python HandTrackingModule.py extract <source> <output.parquet>
+    if len(sys.argv) > 1 and sys.argv[1] == "extract":
+        batch_main(sys.argv[2:])
+    else:
+        main()
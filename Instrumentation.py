@@ -0,0 +1,157 @@
+# Instrumentation.py
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Stages of one frame, in pipeline order
+STAGES = ['capture', 'convert', 'inference', 'landmarks', 'composite', 'encode', 'publish']
+
+NO_SPAN = nullcontext()
+
+
+class StageProfiler:
+    """Per-stage timings kept in fixed-size ring buffers.
+
+    Spans use the monotonic perf_counter clock and can be recorded from any
+    thread. Memory stays constant: each stage keeps its last `capacity`
+    samples, which is what the rolling percentiles are computed from.
+    """
+
+    def __init__(self, capacity=300, stages=STAGES, tracer=None):
+        self.capacity = capacity
+        # Optional TraceRecorder that also gets every span as a trace event
+        self.tracer = tracer
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        for stage in stages:
+            self._buffer(stage)
+
+    def _buffer(self, stage):
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = np.zeros(self.capacity, np.float64)
+            self._counts[stage] = 0
+        return samples
+
+    def record(self, stage, seconds):
+        with self._lock:
+            samples = self._buffer(stage)
+            samples[self._counts[stage] % self.capacity] = seconds
+            self._counts[stage] += 1
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.record(stage, end - start)
+            tracer = self.tracer
+            if tracer is not None:
+                tracer.add(stage, start, end)
+
+    def samples(self, stage):
+        """The stage's retained samples in seconds, oldest first."""
+        with self._lock:
+            count = self._counts.get(stage, 0)
+            samples = self._samples.get(stage)
+            if not count:
+                return np.zeros(0, np.float64)
+            if count <= self.capacity:
+                return samples[:count].copy()
+            start = count % self.capacity
+            return np.concatenate((samples[start:], samples[:start]))
+
+    def summary(self):
+        """Rolling count/mean/p50/p95/p99 in milliseconds for every stage with samples."""
+        rows = {}
+        for stage in list(self._samples):
+            ms = self.samples(stage) * 1000.0
+            if not len(ms):
+                continue
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            rows[stage] = {'count': self._counts[stage], 'mean_ms': float(ms.mean()),
+                           'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+        return rows
+
+    def reset(self):
+        with self._lock:
+            for stage in self._samples:
+                self._counts[stage] = 0
+
+    def to_csv(self):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+        for stage, row in self.summary().items():
+            writer.writerow([stage, row['count']] + [f"{row[k]:.3f}" for k in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms')])
+        return out.getvalue()
+
+    def to_json(self, samples=True):
+        data = {'summary': self.summary()}
+        if samples:
+            data['samples_ms'] = {stage: (self.samples(stage) * 1000.0).round(3).tolist()
+                                  for stage in self._samples if self._counts[stage]}
+        return json.dumps(data, indent=2)
+
+    def dump(self, path):
+        """Write the timings to path; .csv gives the summary, anything else JSON."""
+        with open(path, 'w', newline='') as f:
+            f.write(self.to_csv() if path.endswith('.csv') else self.to_json())
+
+
+class TraceRecorder:
+    """Opt-in recorder of spans in the Chrome trace_event format.
+
+    Every span becomes a complete ("X") event on the thread it ran on, so
+    capture, inference and render show up as separate rows in chrome://tracing
+    or Perfetto. The buffer is bounded: past maxEvents the oldest events are
+    dropped, and flush() writes what is left to a JSON file.
+    """
+
+    def __init__(self, maxEvents=100000):
+        self.events = deque(maxlen=maxEvents)
+        self._threads = {}
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def add(self, name, start, end, category='stage', **args):
+        """Record a span from perf_counter() start/end times in seconds."""
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': self._pid, 'tid': tid,
+                 'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category='stage', **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), category, **args)
+
+    def to_dict(self):
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in list(self._threads.items())]
+        return {'traceEvents': names + list(self.events), 'displayTimeUnit': 'ms'}
+
+    def flush(self, path):
+        """Write the buffered events to path and clear the buffer; returns the event count."""
+        data = self.to_dict()
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        self.events.clear()
+        return len(data['traceEvents'])
@@ -0,0 +1,392 @@
+# PainterEngine.py
+import zlib
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class UndoHistory:
+    """Undo/redo for the painter canvas, stored as compressed tile deltas.
+
+    Instead of a full imgCanvas.copy() per step, commit() compares the
+    canvas with the last committed state tile by tile and keeps only the
+    changed tiles, as zlib-compressed XOR deltas. XOR-ing a delta back in
+    undoes the step and XOR-ing it again redoes it, so one payload serves
+    both directions. Once the history grows past `budget` bytes the oldest
+    steps are dropped.
+
+    The canvas is edited in place, so the painter keeps drawing on the same
+    array. Text objects are small and are kept as plain lists per step.
+
+    Drawing is grouped into strokes: beginStroke() when the draw gesture
+    starts, endStroke() when it ends (the painter's xp, yp = 0, 0 reset),
+    and everything in between is one undo step. Text moves work the same.
+    touch() reports the rectangles a stroke drew into, so endStroke() only
+    scans those tiles.
+    """
+
+    def __init__(self, canvas, tileSize=64, budget=32 * 1024 * 1024, level=1):
+        self.canvas = canvas
+        self.tileSize = tileSize
+        self.budget = budget
+        self.level = level
+        self.undoStack = deque()
+        self.redoStack = deque()
+        self.bytes = 0
+        self._base = canvas.copy()
+        self._text = []
+        self._stroke = False
+        self._strokeRect = None  # (x0, y0, x1, y1) touched by the open stroke
+
+    def __len__(self):
+        return len(self.undoStack)
+
+    @property
+    def canUndo(self):
+        return bool(self.undoStack) or self.changed()
+
+    @property
+    def canRedo(self):
+        return bool(self.redoStack)
+
+    @property
+    def inStroke(self):
+        return self._stroke
+
+    def _changedTiles(self, rect=None):
+        # Tile-aligned region to scan: the whole canvas or the tiles under rect
+        t = self.tileSize
+        h, w = self.canvas.shape[:2]
+        x0, y0, x1, y1 = rect if rect is not None else (0, 0, w, h)
+        x0, y0 = max(x0, 0) // t * t, max(y0, 0) // t * t
+        x1, y1 = min(x1, w), min(y1, h)
+        if x1 <= x0 or y1 <= y0:
+            return np.zeros((0, 2), np.intp)
+        canvas = self.canvas[y0:y1, x0:x1]
+        base = self._base[y0:y1, x0:x1]
+        # Max of the absolute difference per tile; channels are folded into
+        # the columns so one reduceat per axis covers the region
+        rows = canvas.shape[0]
+        diff = cv2.absdiff(canvas.reshape(rows, -1), base.reshape(rows, -1))
+        diff = np.maximum.reduceat(diff, np.arange(0, rows, t), axis=0)
+        channels = canvas.shape[2] if canvas.ndim == 3 else 1
+        diff = np.maximum.reduceat(diff, np.arange(0, x1 - x0, t) * channels, axis=1)
+        return np.argwhere(diff) + (y0 // t, x0 // t)
+
+    def changed(self, textObjects=None):
+        """True when the canvas (or the text) differs from the last commit."""
+        if textObjects is not None and list(textObjects) != self._text:
+            return True
+        return not np.array_equal(self.canvas, self._base)
+
+    def beginStroke(self):
+        """Open a stroke; changes until endStroke() become one undo step."""
+        if not self._stroke:
+            self._stroke = True
+            self._strokeRect = None
+
+    def touch(self, rect):
+        """Mark (x0, y0, x1, y1) as drawn into by the open stroke."""
+        if rect is None:
+            return
+        if self._strokeRect is None:
+            self._strokeRect = tuple(rect)
+        else:
+            a = self._strokeRect
+            self._strokeRect = (min(a[0], rect[0]), min(a[1], rect[1]), max(a[2], rect[2]), max(a[3], rect[3]))
+
+    def endStroke(self, textObjects=None):
+        """Close the open stroke and commit it; False if none was open or it changed nothing."""
+        if not self._stroke:
+            return False
+        rect, self._stroke, self._strokeRect = self._strokeRect, False, None
+        return self.commit(textObjects, rect)
+
+    def commit(self, textObjects=None, rect=None):
+        """Record everything changed since the last commit as one undo step.
+
+        With rect only the tiles under it are compared. Returns False when
+        nothing changed. A new step clears the redo stack.
+        """
+        text = self._text if textObjects is None else list(textObjects)
+        tiles = []
+        size = 0
+        t = self.tileSize
+        for ty, tx in self._changedTiles(rect):
+            y, x = ty * t, tx * t
+            after = self.canvas[y:y + t, x:x + t]
+            before = self._base[y:y + t, x:x + t]
+            delta = zlib.compress(np.bitwise_xor(after, before).tobytes(), self.level)
+            tiles.append((y, x, after.shape[0], after.shape[1], delta))
+            before[:] = after
+            size += len(delta)
+        if not tiles and text == self._text:
+            return False
+
+        self._dropRedo()
+        step = {'tiles': tiles, 'text': (self._text, text), 'bytes': size + 64 * len(tiles)}
+        self._text = text
+        self.undoStack.append(step)
+        self.bytes += step['bytes']
+        # Evict the oldest steps, but always keep the newest one
+        while self.bytes > self.budget and len(self.undoStack) > 1:
+            self.bytes -= self.undoStack.popleft()['bytes']
+        return True
+
+    def _apply(self, step):
+        for y, x, h, w, delta in step['tiles']:
+            tile = np.frombuffer(zlib.decompress(delta), np.uint8).reshape((h, w) + self.canvas.shape[2:])
+            np.bitwise_xor(self.canvas[y:y + h, x:x + w], tile, out=self.canvas[y:y + h, x:x + w])
+            self._base[y:y + h, x:x + w] = self.canvas[y:y + h, x:x + w]
+
+    def undo(self, textObjects=None):
+        """Step back once; returns the text objects to restore, or None if
+        there was nothing to undo. Uncommitted changes count as a step."""
+        self._stroke = False
+        self.commit(textObjects)
+        if not self.undoStack:
+            return None
+        step = self.undoStack.pop()
+        self._apply(step)
+        self._text = step['text'][0]
+        self.redoStack.append(step)
+        return list(self._text)
+
+    def redo(self):
+        """Step forward once; returns the text objects to restore, or None."""
+        # Drawing after an undo starts a new branch, which drops the redo steps
+        self._stroke = False
+        self.commit()
+        if not self.redoStack:
+            return None
+        step = self.redoStack.pop()
+        self._apply(step)
+        self._text = step['text'][1]
+        self.undoStack.append(step)
+        return list(self._text)
+
+    def _dropRedo(self):
+        while self.redoStack:
+            self.bytes -= self.redoStack.pop()['bytes']
+
+    def clear(self):
+        """Forget the history and make the current canvas the new baseline."""
+        self.undoStack.clear()
+        self.redoStack.clear()
+        self.bytes = 0
+        self._stroke = False
+        self._base[:] = self.canvas
+
+
+class CanvasCompositor:
+    """Merge the painter canvas onto camera frames with a maintained ink mask.
+
+    Gives the same result as the painter's per-frame
+    cvtColor -> threshold -> cvtColor -> bitwise_and -> bitwise_or, but the
+    mask is only rebuilt inside the rectangles reported to update(), and the
+    merge is a masked copy over the bounding box of what is on the canvas.
+
+    Pixels darker than the threshold (blue ink is gray 29) are not in the
+    ink mask, so the old pipeline ORs them into the frame; that is kept by
+    an extra bitwise_or whenever the canvas holds such pixels.
+    """
+
+    def __init__(self, canvas, threshold=50):
+        self.canvas = canvas
+        self.threshold = threshold
+        self.ink = np.zeros(canvas.shape[:2], np.uint8)
+        self.bounds = None  # (x0, y0, x1, y1) of everything non-zero on the canvas
+        self._dark = False
+        self.update()
+
+    def update(self, rect=None):
+        """Rebuild the mask inside rect (x0, y0, x1, y1), or everywhere if None.
+
+        Call after drawing into the canvas, and with no rect after the
+        canvas was replaced wholesale (undo, redo, clear).
+        """
+        h, w = self.canvas.shape[:2]
+        full = rect is None
+        x0, y0, x1, y1 = (0, 0, w, h) if full else rect
+        x0, y0, x1, y1 = max(x0, 0), max(y0, 0), min(x1, w), min(y1, h)
+        if full:
+            self.bounds = None
+            self._dark = False
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        region = self.canvas[y0:y1, x0:x1]
+        gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+        ink = cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY)[1]
+        self.ink[y0:y1, x0:x1] = ink
+        occupied = region.max(axis=2)
+        count = cv2.countNonZero(occupied)
+        if not count:
+            return
+        # Anything non-zero outside the ink mask is dark ink that gets ORed in
+        if count > cv2.countNonZero(ink):
+            self._dark = True
+        bx, by, bw, bh = cv2.boundingRect(occupied)
+        box = (x0 + bx, y0 + by, x0 + bx + bw, y0 + by + bh)
+        if self.bounds is None:
+            self.bounds = box
+        else:
+            b = self.bounds
+            self.bounds = (min(b[0], box[0]), min(b[1], box[1]), max(b[2], box[2]), max(b[3], box[3]))
+
+    def apply(self, img):
+        """Composite the canvas onto img in place and return it."""
+        if self.bounds is None:
+            return img
+        x0, y0, x1, y1 = self.bounds
+        dst = img[y0:y1, x0:x1]
+        src = self.canvas[y0:y1, x0:x1]
+        if self._dark:
+            cv2.bitwise_or(dst, src, dst=dst)
+        cv2.copyTo(src, self.ink[y0:y1, x0:x1], dst)
+        return img
+
+
+class OverlayCompositor:
+    """The painter's static overlays: tool header, typing bar and guide.
+
+    Layers are prepared once, resized to the frame and cached per tool or
+    guide index, and each is applied in place with a single OpenCV call:
+    a copy for the header, convertScaleAbs for the typing bar (blending
+    with a constant color is just a scale and an offset) and addWeighted
+    into the frame for the guide. Results match the painter's addWeighted
+    code exactly, without its per-frame allocations.
+    """
+
+    def __init__(self, headers, guides=(), headerHeight=125, barHeight=100,
+                 barColor=50, barAlpha=0.3, guideAlpha=0.3, frameAlpha=0.3):
+        # barColor is the gray level of the typing bar, (50, 50, 50) in the painter
+        self.headers = list(headers)
+        self.guides = list(guides)
+        self.headerHeight = headerHeight
+        self.barHeight = barHeight
+        # Typing bar: frame * (1 - barAlpha) + barColor * barAlpha, with the
+        # constant term premultiplied once
+        self.barScale = 1.0 - barAlpha
+        self.barOffset = barColor * barAlpha
+        self.guideAlpha = guideAlpha
+        self.frameAlpha = frameAlpha
+        self.tool = 0
+        self._cache = {}
+
+    def setTool(self, index):
+        self.tool = index
+
+    def _layer(self, kind, index, size):
+        key = (kind, index, size)
+        layer = self._cache.get(key)
+        if layer is None:
+            source = self.headers[index] if kind == 'header' else self.guides[index]
+            if (source.shape[1], source.shape[0]) != size:
+                source = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+            layer = self._cache[key] = np.ascontiguousarray(source)
+        return layer
+
+    def applyHeader(self, img, index=None):
+        if not self.headers:
+            return img
+        w = img.shape[1]
+        img[:self.headerHeight] = self._layer('header', self.tool if index is None else index,
+                                              (w, self.headerHeight))
+        return img
+
+    def applyTypingBar(self, img):
+        bar = img[img.shape[0] - self.barHeight:]
+        cv2.convertScaleAbs(bar, dst=bar, alpha=self.barScale, beta=self.barOffset)
+        return img
+
+    def applyGuide(self, img, index):
+        if index is None or not self.guides:
+            return img
+        area = img[self.headerHeight:]
+        guide = self._layer('guide', index, (area.shape[1], area.shape[0]))
+        cv2.addWeighted(guide, self.guideAlpha, area, self.frameAlpha, 0, dst=area)
+        return img
+
+    def apply(self, img, guide=None, typingBar=False):
+        """Header, then the typing bar, then the guide, as the painter layers them."""
+        self.applyHeader(img)
+        if typingBar:
+            self.applyTypingBar(img)
+        return self.applyGuide(img, guide)
+
+
+# Uniform Catmull-Rom basis: point(t) = [1, t, t^2, t^3] @ CATMULL_ROM @ [p0, p1, p2, p3]
+CATMULL_ROM = 0.5 * np.array([[0, 2, 0, 0],
+                              [-1, 0, 1, 0],
+                              [2, -5, 4, -1],
+                              [-1, 3, -3, 1]], np.float32)
+
+
+class BrushEngine:
+    """Draws the painter's strokes into the canvas, one polylines call per frame.
+
+    Each frame's segment from the previous fingertip position to the new one
+    is built in NumPy (a straight line, or a Catmull-Rom curve through the
+    recent points when smooth is set) and rasterized with a single
+    cv2.polylines call. Only the canvas is drawn on: the returned dirty rect
+    is passed to the compositor and the undo history, and the live frame
+    shows the stroke through CanvasCompositor.apply().
+    """
+
+    def __init__(self, canvas, compositor=None, history=None, smooth=False, samples=10):
+        self.canvas = canvas
+        self.compositor = compositor
+        self.history = history
+        self.smooth = smooth
+        self.samples = samples
+        self.points = []  # last two points of the open stroke
+        t = np.linspace(0.0, 1.0, samples + 1, dtype=np.float32)
+        self._basis = np.stack([np.ones_like(t), t, t * t, t * t * t], axis=1) @ CATMULL_ROM
+
+    @property
+    def drawing(self):
+        return bool(self.points)
+
+    def _segment(self, point):
+        if not self.points:
+            # First point of a stroke: a dot, like the painter's first frame
+            return np.array([point, point], np.float32)
+        a = np.asarray(self.points[-1], np.float32)
+        b = np.asarray(point, np.float32)
+        if not self.smooth:
+            return np.stack([a, b])
+        # Tangent at a from the point before it, and b's successor mirrored
+        # from a since it is not known yet
+        before = np.asarray(self.points[-2], np.float32) if len(self.points) > 1 else a
+        controls = np.stack([before, a, b, 2 * b - a])
+        return self._basis @ controls
+
+    def strokeTo(self, point, color, thickness):
+        """Extend the open stroke (or start one) to point; returns the dirty rect."""
+        # Ask the history rather than checking self.points: an undo or redo
+        # mid-stroke closes its stroke while the brush is still down
+        if self.history is not None and not self.history.inStroke:
+            self.history.beginStroke()
+        pts = np.rint(self._segment(point)).astype(np.int32)
+        cv2.polylines(self.canvas, [pts], False, color, thickness)
+        self.points = self.points[-1:] + [tuple(point)]
+
+        h, w = self.canvas.shape[:2]
+        pad = thickness // 2 + 2
+        x0, y0 = pts.min(axis=0) - pad
+        x1, y1 = pts.max(axis=0) + pad + 1
+        rect = (max(int(x0), 0), max(int(y0), 0), min(int(x1), w), min(int(y1), h))
+        if self.compositor is not None:
+            self.compositor.update(rect)
+        if self.history is not None:
+            self.history.touch(rect)
+        return rect
+
+    def endStroke(self, textObjects=None):
+        """Close the open stroke; with a history it becomes one undo step."""
+        self.points = []
+        if self.history is not None:
+            return self.history.endStroke(textObjects)
+        return False
@@ -0,0 +1,187 @@
+# TrackingBenchmark.py
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import HandTrackingModule as htm
+from FrameSource import open_source
+from PainterEngine import CanvasCompositor
+
+
+def load_frames(source="synthetic", count=100, size=(1280, 720)):
+    """Load a fixed set of frames into memory so capture I/O is not measured."""
+    src = open_source(source) if source != "synthetic" else open_source(source, width=size[0], height=size[1])
+    frames = []
+    try:
+        while len(frames) < count:
+            success, img = src.read()
+            if not success:
+                break
+            if (img.shape[1], img.shape[0]) != tuple(size):
+                img = cv2.resize(img, tuple(size))
+            frames.append(img)
+    finally:
+        src.release()
+    if not frames:
+        raise ValueError(f"No frames could be read from {source!r}")
+    # Loop short sources up to the requested count
+    return [frames[i % len(frames)] for i in range(count)]
+
+
+def make_canvas(size=(1280, 720)):
+    # A canvas with a few strokes, like the painter's imgCanvas mid-session
+    canvas = np.zeros((size[1], size[0], 3), np.uint8)
+    for i, color in enumerate([(255, 0, 255), (255, 0, 0), (0, 255, 0), (0, 255, 255)]):
+        y = 200 + i * 120
+        cv2.line(canvas, (100, y), (size[0] - 100, y + 60), color, 10)
+    return canvas
+
+
+def summarize(samples):
+    """Throughput and latency percentiles (ms) for one stage."""
+    ms = np.asarray(samples, np.float64) * 1000.0
+    if not len(ms):
+        return {'calls': 0}
+    total = ms.sum() / 1000.0
+    return {
+        'calls': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'throughput_fps': float(len(ms) / total) if total > 0 else None,
+    }
+
+
+def run_benchmark(frames, warmup=5, **detector_args):
+    """Replay frames through each stage of the tracking and painter hot path."""
+    detector = htm.handDetector(**detector_args)
+    h, w = frames[0].shape[:2]
+    canvas = make_canvas((w, h))
+    compositor = CanvasCompositor(canvas)
+    header_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'header', '0.png')
+    header = cv2.imread(header_path)
+    if header is None or header.shape[1] != w:
+        header = np.zeros((125, w, 3), np.uint8)
+
+    stages = ['findHands', 'findPosition', 'fingersUp', 'composite', 'composite_masked', 'header', 'toRGB']
+    samples = {stage: [] for stage in stages}
+    clock = time.perf_counter
+
+    for i, frame in enumerate(frames[:warmup] + frames):
+        record = i >= warmup
+        if i == warmup:
+            # Count inferences over the measured frames only
+            detector.inferenceCount = 0
+        img = frame.copy()
+
+        t0 = clock()
+        img = detector.findHands(img, draw=False)
+        t1 = clock()
+        lmList = detector.findPosition(img, draw=False)
+        t2 = clock()
+        if record:
+            samples['findHands'].append(t1 - t0)
+            samples['findPosition'].append(t2 - t1)
+        if lmList:
+            t0 = clock()
+            detector.fingersUp()
+            if record:
+                samples['fingersUp'].append(clock() - t0)
+
+        # The same merge through the maintained ink mask, on its own copy
+        masked = img.copy()
+        t0 = clock()
+        compositor.apply(masked)
+        if record:
+            samples['composite_masked'].append(clock() - t0)
+
+        # Painter compositing, as in VirtualPainter.run_virtuals_painter
+        t0 = clock()
+        imgGray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
+        _, imgInv = cv2.threshold(imgGray, 50, 255, cv2.THRESH_BINARY_INV)
+        imgInv = cv2.cvtColor(imgInv, cv2.COLOR_GRAY2BGR)
+        img = cv2.bitwise_and(img, imgInv)
+        img = cv2.bitwise_or(img, canvas)
+        t1 = clock()
+        img[0:header.shape[0], 0:w] = header
+        t2 = clock()
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        t3 = clock()
+        if record:
+            samples['composite'].append(t1 - t0)
+            samples['header'].append(t2 - t1)
+            samples['toRGB'].append(t3 - t2)
+
+    count = len(frames)
+    report = {
+        'frames': count,
+        'resolution': [w, h],
+        'detector': {key: list(value) if isinstance(value, tuple) else value
+                     for key, value in detector_args.items()},
+        'hands_detected_frames': len(samples['fingersUp']),
+        'inference_calls': detector.inferenceCount,
+        'stages': {stage: summarize(samples[stage]) for stage in stages},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+    }
+    # composite_masked is an alternative to composite, not another step
+    per_frame = sum(sum(samples[stage]) for stage in stages if stage != 'composite_masked') / count
+    report['total'] = {'mean_ms': per_frame * 1000.0, 'throughput_fps': 1.0 / per_frame if per_frame else None}
+    return report
+
+
+def print_report(report, out=sys.stderr):
+    print(f"{report['frames']} frames at {report['resolution'][0]}x{report['resolution'][1]}, "
+          f"hands in {report['hands_detected_frames']}", file=out)
+    print(f"{'stage':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'fps':>10}", file=out)
+    for stage, stats in report['stages'].items():
+        if not stats['calls']:
+            print(f"{stage:<18}{'-':>9}{'-':>9}{'-':>9}{'-':>10}", file=out)
+            continue
+        print(f"{stage:<18}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+              f"{stats['throughput_fps']:>10.1f}", file=out)
+    print(f"{'total':<18}{report['total']['mean_ms']:>9.2f}{'':>18}{report['total']['throughput_fps']:>10.1f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hand-tracking hot path.")
+    parser.add_argument("--source", default="synthetic",
+                        help="'synthetic', a video file or an image directory")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--detection-con", type=float, default=0.5)
+    parser.add_argument("--inference-size", default=None, help="e.g. 640x360")
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.source, args.frames)
+    detector_args = {'maxHands': args.max_hands, 'detectionCon': args.detection_con}
+    if args.inference_size:
+        detector_args['inferenceSize'] = tuple(map(int, args.inference_size.split("x")))
+    report = run_benchmark(frames, warmup=args.warmup, **detector_args)
+    report['source'] = args.source
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
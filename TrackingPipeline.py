@@ -0,0 +1,309 @@
+# TrackingPipeline.py
+import queue
+import threading
+import time
+
+import cv2
+
+from Instrumentation import NO_SPAN
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item instead of blocking the producer."""
+
+    def __init__(self, maxsize=1):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                # Drop stale frame so latency never grows with a backlog
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def clear(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class TrackedFrame:
+    """One frame after inference, with its own copy of the landmark state.
+
+    Color conversions of img are cached per frame, so the detector,
+    compositor and publisher share each color space instead of each
+    converting again. Whoever draws on img must call invalidate().
+    """
+
+    def __init__(self, img, index, captureTime):
+        self.img = img
+        self.index = index
+        self.captureTime = captureTime
+        self.inferenceTime = 0.0
+        self.results = None  # MediaPipe results the landmarks came from
+        self.numHands = 0
+        self.handTypes = []
+        self.landmarks = None  # (hands, 21, 3) int32 of [id, cx, cy]
+        self.fingers = None  # uint8 finger bitmask per hand
+        self._conversions = {}
+
+    def convert(self, code, size=None):
+        """Return img converted with cv2 code (optionally resized first), cached."""
+        key = (code, size)
+        converted = self._conversions.get(key)
+        if converted is None:
+            src = self.img
+            if size is not None:
+                src = self._conversions.get(size)
+                if src is None:
+                    src = self._conversions[size] = cv2.resize(self.img, size, interpolation=cv2.INTER_AREA)
+            converted = self._conversions[key] = cv2.cvtColor(src, code)
+        return converted
+
+    def invalidate(self):
+        self._conversions.clear()
+
+    @property
+    def lmList(self):
+        # Same list form as handDetector.findPosition() for the first hand
+        return self.landmarks[0].tolist() if self.numHands else []
+
+
+class TrackingPipeline:
+    """Capture -> inference -> render pipeline for a handDetector.
+
+    Capture and inference run on their own threads and are joined by
+    single-slot queues that keep only the newest frame. The render stage is
+    the caller iterating over frames(), so Streamlit publishing stays on the
+    script thread and overlaps with inference of the next frame.
+    """
+
+    def __init__(self, cap, detector, draw=True, flip=False, queueSize=1, profiler=None):
+        self.cap = cap
+        self.detector = detector
+        self.draw = draw
+        self.flip = flip
+        self.profiler = profiler
+        self.captureQueue = LatestQueue(queueSize)
+        self.renderQueue = LatestQueue(queueSize)
+        self._stopEvent = threading.Event()
+        self._runEvent = threading.Event()
+        self._detectorLock = threading.Lock()
+        self._threads = []
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    @property
+    def dropped(self):
+        return self.captureQueue.dropped + self.renderQueue.dropped
+
+    @property
+    def paused(self):
+        return not self._runEvent.is_set()
+
+    def start(self):
+        self._runEvent.set()
+        if self.running:
+            return
+        self._stopEvent.clear()
+        self._threads = [
+            threading.Thread(target=self._captureLoop, name="capture", daemon=True),
+            threading.Thread(target=self._inferenceLoop, name="inference", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def pause(self):
+        """Park the stage threads on an event; the capture device stays open."""
+        self._runEvent.clear()
+        self.captureQueue.clear()
+        self.renderQueue.clear()
+
+    def resume(self):
+        self.start()
+
+    def setDetector(self, detector):
+        """Swap the detector between frames; returns the previous one."""
+        with self._detectorLock:
+            previous, self.detector = self.detector, detector
+        return previous
+
+    def stop(self, timeout=1.0):
+        self._stopEvent.set()
+        self._runEvent.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self.captureQueue.clear()
+        self.renderQueue.clear()
+
+    def read(self, timeout=1.0):
+        """Return the newest TrackedFrame, or None if none arrived within timeout."""
+        return self.renderQueue.get(timeout)
+
+    def frames(self, timeout=1.0):
+        while not self._stopEvent.is_set():
+            frame = self.read(timeout)
+            if frame is not None:
+                yield frame
+
+    def _span(self, stage):
+        return self.profiler.span(stage) if self.profiler is not None else NO_SPAN
+
+    def _captureLoop(self):
+        index = 0
+        while not self._stopEvent.is_set():
+            if not self._runEvent.wait(0.5):
+                continue
+            with self._span('capture'):
+                success, img = self.cap.read()
+            if not success:
+                time.sleep(0.005)
+                continue
+            if self.flip:
+                img = cv2.flip(img, 1)
+            elif not img.flags.writeable:
+                # Shared camera frame; the frame is drawn on downstream
+                img = img.copy()
+            self.captureQueue.put(TrackedFrame(img, index, time.time()))
+            index += 1
+
+    def _inferenceLoop(self):
+        while not self._stopEvent.is_set():
+            if not self._runEvent.wait(0.5):
+                continue
+            frame = self.captureQueue.get(timeout=0.1)
+            if frame is None:
+                continue
+            start = time.time()
+            with self._detectorLock:
+                detector = self.detector
+                frame.img = detector.findHands(frame.img, draw=self.draw, frame=frame)
+                frame.results = detector.results
+                frame.landmarks = detector.findAllPositions(frame.img).copy()
+                frame.fingers = detector.fingersUpAll()
+                frame.numHands = detector.numHands
+                frame.handTypes = list(detector.handTypes)
+            frame.inferenceTime = time.time() - start
+            self.renderQueue.put(frame)
+
+
+class TrackingController:
+    """Start/stop controller around a TrackingPipeline that outlives script reruns.
+
+    While paused the pipeline threads block on an event instead of spinning,
+    and the camera stays open so resume() is instant. A watchdog pauses the
+    pipeline when nobody has read a frame for idleTimeout seconds (e.g. a
+    closed tab), and closes the controller once it has stayed paused for that
+    long. close() releases the camera, ends the watchdog and hands the
+    detector to onClose (e.g. DetectorPool.release); a closed controller
+    cannot be resumed.
+    """
+
+    def __init__(self, openSource, detector, idleTimeout=30.0, onClose=None, **pipelineArgs):
+        self.openSource = openSource
+        self.detector = detector
+        self.idleTimeout = idleTimeout
+        self.onClose = onClose
+        self.pipelineArgs = pipelineArgs
+        self.pipeline = None
+        self._lock = threading.Lock()
+        self._lastActive = time.monotonic()
+        self._closed = threading.Event()
+        self._watchdog = threading.Thread(target=self._watch, name="tracking-watchdog", daemon=True)
+        self._watchdog.start()
+
+    @property
+    def running(self):
+        return self.pipeline is not None and not self.pipeline.paused
+
+    @property
+    def sourceOpen(self):
+        return self.pipeline is not None
+
+    @property
+    def sourceFps(self):
+        """Nominal frame rate of the open source, or None."""
+        pipeline = self.pipeline
+        return getattr(pipeline.cap, 'fps', None) if pipeline is not None else None
+
+    @property
+    def closed(self):
+        return self._closed.is_set()
+
+    def resume(self):
+        with self._lock:
+            if self._closed.is_set():
+                raise RuntimeError("TrackingController is closed")
+            if self.pipeline is None:
+                self.pipeline = TrackingPipeline(self.openSource(), self.detector, **self.pipelineArgs)
+            self._lastActive = time.monotonic()
+            self.pipeline.resume()
+
+    def pause(self):
+        with self._lock:
+            if self.pipeline is not None:
+                self.pipeline.pause()
+            self._lastActive = time.monotonic()
+
+    def setDetector(self, detector):
+        """Use detector from the next frame on; returns the previous one."""
+        with self._lock:
+            previous, self.detector = self.detector, detector
+            if self.pipeline is not None:
+                self.pipeline.setDetector(detector)
+        return previous
+
+    def read(self, timeout=1.0):
+        pipeline = self.pipeline
+        if pipeline is None or pipeline.paused:
+            return None
+        self._lastActive = time.monotonic()
+        return pipeline.read(timeout)
+
+    def releaseSource(self):
+        with self._lock:
+            pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.stop()
+            pipeline.cap.release()
+
+    def close(self):
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            detector, self.detector = self.detector, None
+        self.releaseSource()
+        if self.onClose is not None and detector is not None:
+            self.onClose(detector)
+
+    def _watch(self):
+        while not self._closed.wait(1.0):
+            idle = time.monotonic() - self._lastActive
+            if idle < self.idleTimeout:
+                continue
+            if self.running:
+                # Nobody is reading frames any more
+                self.pause()
+            else:
+                # Paused for idleTimeout too: give back the camera and the
+                # detector and stop watching
+                self.close()